@@ -1,197 +1,449 @@
-import cv2
+import asyncio
+import json
 import os
+import sys
+
+# 利用可能なバックエンドの総当たりを避けるため、cv2 のインポート前にV4L2を優先させる
+if sys.platform.startswith('linux'):
+    os.environ.setdefault('OPENCV_VIDEOIO_PRIORITY_LIST', 'V4L2')
+
+import cv2
+import numpy as np
+import stat
 import time
-import queue
+import itertools
+import random
+from datetime import datetime
 from threading import Thread, Event, Lock
 from typing import Optional, Dict, Any
-from dataclasses import asdict
+from dataclasses import dataclass, field, asdict
 
 from config import CameraConfig
 from logging_config import get_logger
 
+# libjpeg-turbo（PyTurboJPEG）が利用可能ならSIMD対応のJPEGエンコーダーを使う
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    _turbojpeg = TurboJPEG()
+except Exception:  # 未インストール、または libturbojpeg が見つからない
+    _turbojpeg = None
+
+# orjson が利用可能なら高速なJSONシリアライザーを使う
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@dataclass(slots=True)
+class CameraStats:
+    """カメラ統計情報"""
+    frames_captured: int = 0
+    frames_skipped: int = 0
+    connection_errors: int = 0
+    last_reconnect: Optional[float] = None  # time.time() 基準（ISO形式への変換は get_status で行う）
+    uptime_start: int = field(default_factory=time.monotonic_ns)  # time.monotonic_ns() 基準
+
 
 class CameraManager:
     """高信頼性カメラマネージャー"""
 
+    # シリアライズ済みステータスを使い回す期間（秒）
+    STATUS_CACHE_TTL = 0.5
+    # 古いフレームの読み飛ばしで1回に grab() する上限（V4L2 の既定バッファ数）
+    MAX_STALE_GRABS = 4
+
     def __init__(self, config: CameraConfig):
         self.config = config
+        # 設定は実行中に差し替えられないため、ステータス用の辞書は一度だけ生成する
+        self._config_dict = asdict(config)
         self.cap: Optional[cv2.VideoCapture] = None
         self.is_running = Event()
         self.is_connected = Event()
+        self.stop_requested = Event()  # 再接続待機を stop() で中断するため
         self.thread: Optional[Thread] = None
-        self.frame_queue = queue.Queue(maxsize=config.buffer_size)
         self.lock = Lock()
-        self.last_frame_time = 0
+        # start() と stop() を排他にする（API・シグナル・終了処理から別スレッドで呼ばれうるため）
+        self._lifecycle_lock = Lock()
+        # self.cap の差し替え世代。キャプチャスレッドはロックを取らずにこれで整合性を確認する
+        self._cap_gen = 0
+        # 全視聴者に配信する最新フレームのJPEG (jpeg, timestamp, seq) と購読者ごとの通知イベント
+        self._latest: Optional[tuple[bytes, float, int]] = None
+        self._latest_seq = itertools.count(1)
+        self._subscribers: set[asyncio.Event] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # subscribe() の初回呼び出し時に設定
+        # retrieve() の書き込み先として再利用するフレームバッファ（フレームはエンコード後すぐ不要になる）
+        self._frame_buffer: Optional[np.ndarray] = None
+        self.last_frame_time = 0  # time.monotonic_ns() 基準
+        self.last_grab_time = 0  # time.monotonic_ns() 基準（grab() 完了時刻）
         self.reconnect_attempts = 0
-        self.stats = {
-            'frames_captured': 0,
-            'frames_dropped': 0,
-            'connection_errors': 0,
-            'last_reconnect': None,
-            'uptime_start': time.time()
-        }
+        # 目標FPSから求めたフレーム間隔（デコード間引きの判定に使用）
+        self.frame_interval_ns = 1_000_000_000 // config.fps if config.fps > 0 else 0
+        self.stats = CameraStats()
+        # ステータス出力用の開始時刻（time.time() 基準）。稼働時間の計算には stats.uptime_start を使う
+        self._started_at = time.time()
+        self._status_cache: tuple[float, bytes] = (0.0, b'')  # (time.monotonic(), JSON)
+        # cv2.imencode のパラメータ（フレームごとにリストを生成しないよう一度だけ組み立てる）
+        # ハフマンテーブル最適化・プログレッシブは速度を落とす割にサイズがほぼ変わらない
+        self._imencode_params = [
+            int(cv2.IMWRITE_JPEG_QUALITY), int(config.jpeg_quality),
+            int(cv2.IMWRITE_JPEG_OPTIMIZE), 0,
+            int(cv2.IMWRITE_JPEG_PROGRESSIVE), 0,
+        ]
 
         self.logger = get_logger(f"{__name__}.CameraManager")
+        self._log_jpeg_backend()
+
+    def _log_jpeg_backend(self) -> None:
+        """使用するJPEGエンコーダーをログ出力（SIMD非対応のlibjpegなら警告）"""
+        if _turbojpeg is not None:
+            self.logger.info("JPEG encoder: PyTurboJPEG")
+            return
+
+        jpeg_info = next(
+            (line.split(':', 1)[1].strip() for line in cv2.getBuildInformation().splitlines()
+             if line.strip().startswith('JPEG:')),
+            'unknown'
+        )
+        self.logger.info("JPEG encoder: OpenCV (%s)", jpeg_info)
+        if 'turbo' not in jpeg_info:
+            self.logger.warning("OpenCV is not built with libjpeg-turbo; JPEG encoding will be slow")
 
     def start(self) -> bool:
         """カメラ開始"""
-        if self.is_running.is_set():
-            self.logger.warning("Camera is already running")
-            return True
+        with self._lifecycle_lock:
+            if self.is_running.is_set():
+                self.logger.warning("Camera is already running")
+                return True
 
-        if self._initialize_camera():
-            self.is_running.set()
-            self.thread = Thread(target=self._capture_loop, daemon=True)
-            self.thread.start()
-            self.logger.info("Camera started successfully")
-            return True
+            # 前回のキャプチャスレッドが終了していなければ、デバイスを二重に開かない
+            if self.thread and self.thread.is_alive():
+                self.logger.error("Previous capture thread is still running; cannot start camera")
+                return False
 
-        return False
+            if self._initialize_camera():
+                self.stop_requested.clear()
+                self.is_running.set()
+                self.thread = Thread(target=self._capture_loop, daemon=True)
+                self.thread.start()
+                self.logger.info("Camera started successfully")
+                return True
 
-    def stop(self):
-        """カメラ停止"""
-        if not self.is_running.is_set():
-            self.logger.info("Camera is already stopped")
-            return
+            return False
 
-        self.logger.info("Stopping camera...")
-        self.is_running.clear()
-        self.is_connected.clear()
+    def stop(self, join_timeout: float = 10.0):
+        """カメラ停止（キャプチャスレッドの終了を最大 join_timeout 秒待つ）"""
+        with self._lifecycle_lock:
+            if not self.is_running.is_set():
+                self.logger.info("Camera is already stopped")
+                return
 
-        # スレッドの安全な終了を待機
-        if self.thread and self.thread.is_alive():
-            self.logger.info("Waiting for capture thread to finish...")
-            self.thread.join(timeout=10)  # タイムアウトを10秒に延長
-            if self.thread.is_alive():
-                self.logger.warning("Capture thread did not finish gracefully")
+            self.logger.info("Stopping camera...")
+            self.is_running.clear()
+            self.stop_requested.set()
+
+            # 待機中の購読者を起こす
+            self._notify_subscribers()
+            self.is_connected.clear()
+
+            # スレッドの安全な終了を待機
+            if self.thread and self.thread.is_alive():
+                self.logger.info("Waiting for capture thread to finish...")
+                self.thread.join(timeout=join_timeout)
+                if self.thread.is_alive():
+                    # grab() 等でブロックしているスレッドが使用中のデバイスは解放せず、
+                    # キャプチャループの終了時に解放させる
+                    self.logger.warning(
+                        "Capture thread did not finish within %.1fs; camera will be released when it exits",
+                        join_timeout
+                    )
+                    self._latest = None
+                    return
+
+            # カメラリソースの解放
+            with self.lock:
+                self._release_camera()
 
-        # カメラリソースの解放
-        with self.lock:
-            if self.cap:
-                try:
-                    self.cap.release()
-                    self.logger.info("Camera device released")
-                except Exception as e:
-                    self.logger.error(f"Error releasing camera: {e}")
-                finally:
-                    self.cap = None
-
-        # キューをクリア
-        cleared_frames = 0
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-                cleared_frames += 1
-            except queue.Empty:
-                break
+            self._frame_buffer = None
+            self._latest = None
 
-        if cleared_frames > 0:
-            self.logger.info(f"Cleared {cleared_frames} frames from queue")
+            self.logger.info("Camera stopped successfully")
 
-        self.logger.info("Camera stopped successfully")
+    def _release_camera(self) -> None:
+        """カメラデバイスの解放（self.lock を保持した状態で呼び出す）"""
+        if self.cap:
+            try:
+                self.cap.release()
+                self.logger.info("Camera device released")
+            except Exception as e:
+                self.logger.error(f"Error releasing camera: {e}")
+            finally:
+                self.cap = None
+                self._cap_gen += 1
 
     def _initialize_camera(self) -> bool:
         """カメラの初期化"""
         try:
-            # デバイスパスが存在するかチェック（Linux/macOSのみ）
-            if self.config.device_path and not os.path.exists(self.config.device_path):
-                self.logger.error(f"Camera device {self.config.device_path} not found")
-                return False
+            # デバイスパスがキャラクタデバイスとして存在するかチェック（Linux/macOSのみ）
+            if self.config.device_path:
+                try:
+                    st = os.stat(self.config.device_path)
+                except OSError:
+                    self.logger.error("Camera device %s not found", self.config.device_path)
+                    return False
+                if not stat.S_ISCHR(st.st_mode):
+                    self.logger.error("Camera device %s is not a character device", self.config.device_path)
+                    return False
 
             with self.lock:
-                self.cap = cv2.VideoCapture(self.config.device_index)
+                if self.config.gstreamer:
+                    self.cap = cv2.VideoCapture(self._build_gstreamer_pipeline(), cv2.CAP_GSTREAMER)
+                else:
+                    self.cap = cv2.VideoCapture(self.config.device_index)
+                self._cap_gen += 1
 
                 if not self.cap.isOpened():
-                    self.logger.error(f"Failed to open camera {self.config.device_index}")
+                    self.logger.error("Failed to open camera %s", self.config.device_index)
                     return False
 
-                # カメラパラメータ設定
-                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.config.width)
-                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config.height)
-                self.cap.set(cv2.CAP_PROP_FPS, self.config.fps)
-                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # バッファサイズを最小に
+                # カメラパラメータ設定（GStreamer の場合はパイプラインのcapsで指定済み）
+                passthrough = self.config.mjpeg_passthrough
+                if not self.config.gstreamer:
+                    if passthrough:
+                        # カメラのMJPEG出力をデコードせずに受け取る（retrieve() がJPEGのバイト列を返す）
+                        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+                    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.config.width)
+                    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config.height)
+                    self.cap.set(cv2.CAP_PROP_FPS, self.config.fps)
+                    self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # バッファサイズを最小に
+
+                    # MJPEGに対応していないカメラでは通常のデコード・エンコード経路に戻す
+                    if passthrough and int(self.cap.get(cv2.CAP_PROP_FOURCC)) != cv2.VideoWriter_fourcc(*'MJPG'):
+                        self.logger.warning("Camera does not provide MJPEG, falling back to JPEG encoding")
+                        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+                        passthrough = False
 
                 # 設定値の確認
                 actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
                 actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
                 actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
 
-                self.logger.info(f"Camera initialized: {actual_width}x{actual_height} @ {actual_fps}fps")
+                self.logger.info("Camera initialized: %dx%d @ %sfps", actual_width, actual_height, actual_fps)
+
+                # 実際の解像度でフレームバッファを事前確保
+                # MJPEGパススルー時はフレームサイズが可変なので確保しない
+                self._frame_buffer = (
+                    None if passthrough else np.empty((actual_height, actual_width, 3), dtype=np.uint8)
+                )
 
                 self.is_connected.set()
                 self.reconnect_attempts = 0
                 return True
 
         except Exception as e:
-            self.logger.error(f"Camera initialization failed: {e}")
-            self.stats['connection_errors'] += 1
+            self.logger.error("Camera initialization failed: %s", e)
+            self.stats.connection_errors += 1
             return False
 
-    def _capture_loop(self):
+    def _build_gstreamer_pipeline(self) -> str:
+        """v4l2src からMJPEGを受け取るGStreamerパイプライン文字列の生成"""
+        config = self.config
+        device = config.device_path or f"/dev/video{config.device_index}"
+        caps = f"image/jpeg,width={config.width},height={config.height},framerate={config.fps}/1"
+        # パススルー時はJPEGのままアプリへ渡し、それ以外はGStreamer側でBGRにデコードする
+        decode = "" if config.mjpeg_passthrough else " ! jpegdec ! videoconvert ! video/x-raw,format=BGR"
+        # leaky キューと appsink drop で古いフレームはGStreamer内で破棄され、常に最新の1枚だけが残る
+        return (
+            f"v4l2src device={device} ! {caps}{decode}"
+            " ! queue max-size-buffers=1 leaky=downstream"
+            " ! appsink drop=1 max-buffers=1 sync=0"
+        )
+
+    def _capture_loop(self) -> None:
         """フレームキャプチャメインループ"""
         self.logger.info("Starting capture loop")
-
-        while self.is_running.is_set():
+        self._apply_thread_scheduling()
+
+        # ループ内の属性探索を避けるためローカル変数に束縛
+        running = self.is_running.is_set
+        connected = self.is_connected.is_set
+        stats = self.stats
+        # GStreamer の appsink は最新の1枚だけを保持するため、読み飛ばしは不要
+        grab_latest_frame = self._grab_frame if self.config.gstreamer else self._grab_latest_frame
+        retrieve_frame = self._retrieve_frame
+        process_frame = self._process_frame
+
+        while running():
             try:
-                if not self.is_connected.is_set():
+                if not connected():
                     if self.config.auto_reconnect:
                         self._attempt_reconnect()
                     else:
                         break
                     continue
 
-                ret, frame = self._capture_frame()
+                # キャプチャスレッドが self.cap の唯一の利用者なので、定常時はロック不要
+                cap, gen = self.cap, self._cap_gen
+
+                # grab() は常に呼び出してドライバーのバッファを最新に保つ
+                grabbed = grab_latest_frame(cap)
+
+                if not grabbed:
+                    self._handle_capture_failure(gen)
+                    continue
+
+                # 購読者がいなければデコードしても捨てられるだけ
+                if not self._subscribers:
+                    stats.frames_skipped += 1
+                    continue
+
+                ret, frame = retrieve_frame(cap, self._frame_buffer)
 
                 if ret:
-                    self._process_frame(frame)
+                    process_frame(frame)
                 else:
-                    self._handle_capture_failure()
+                    self._handle_capture_failure(gen)
 
             except Exception as e:
-                self.logger.error(f"Unexpected error in capture loop: {e}")
+                self.logger.error("Unexpected error in capture loop: %s", e)
                 self.is_connected.clear()
                 time.sleep(1)
 
+        # stop() がスレッドの終了を待ちきれなかった場合に備え、停止時はここでもデバイスを解放する
+        if not running():
+            with self.lock:
+                self._release_camera()
+
         self.logger.info("Capture loop ended")
 
-    def _capture_frame(self) -> tuple[bool, Optional[any]]:
-        """フレームキャプチャ"""
-        with self.lock:
-            if not self.cap or not self.cap.isOpened():
-                return False, None
-            return self.cap.read()
-
-    def _process_frame(self, frame):
-        """フレーム処理とキューイング"""
-        current_time = time.time()
-        self.last_frame_time = current_time
-        self.stats['frames_captured'] += 1
-
-        # キューが満杯の場合、古いフレームを削除
-        if self.frame_queue.full():
+    def _apply_thread_scheduling(self) -> None:
+        """キャプチャスレッドのCPU固定とリアルタイム優先度設定（Linuxのみ、失敗しても続行）"""
+        # pid に 0 を渡すと呼び出し元スレッドだけが対象になる
+        cpu = self.config.capture_cpu
+        if cpu is not None and hasattr(os, 'sched_setaffinity'):
             try:
-                self.frame_queue.get_nowait()
-                self.stats['frames_dropped'] += 1
-            except queue.Empty:
-                pass
-
+                cpus = sorted(os.sched_getaffinity(0))
+                cpu_id = cpus[cpu] if cpu < 0 else cpu
+                os.sched_setaffinity(0, {cpu_id})
+                self.logger.info("Capture thread pinned to CPU %d", cpu_id)
+            except (OSError, IndexError) as e:
+                self.logger.warning("Failed to set capture thread CPU affinity: %s", e)
+
+        priority = self.config.capture_rt_priority
+        if priority > 0 and hasattr(os, 'sched_setscheduler'):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+                self.logger.info("Capture thread scheduled with SCHED_FIFO priority %d", priority)
+            except OSError as e:
+                # CAP_SYS_NICE がない場合など
+                self.logger.warning("Failed to set SCHED_FIFO for capture thread: %s", e)
+
+    def _grab_frame(self, cap: Optional[cv2.VideoCapture]) -> bool:
+        """フレーム取得（デコードなし）"""
+        if not cap or not cap.isOpened():
+            return False
+        grabbed = cap.grab()
+        if grabbed:
+            self.last_grab_time = time.monotonic_ns()
+        return grabbed
+
+    def _grab_latest_frame(self, cap: Optional[cv2.VideoCapture]) -> bool:
+        """ドライバーのバッファに溜まった古いフレームを読み飛ばして最新フレームをgrab"""
+        # 前回の grab() 完了からフレーム2枚分以上経っていなければ、古いフレームはほとんど溜まっていない
+        # （デコード・エンコードに時間がかかっても、ここで待たされるのはライブのフレームなので読み飛ばさない）
+        if time.monotonic_ns() - self.last_grab_time < 2 * self.frame_interval_ns:
+            return self._grab_frame(cap)
+
+        # 停止後は、バッファ済みのフレームの grab() は即座に返り、ライブのフレームはフレーム間隔近く待たされる
+        threshold = self.frame_interval_ns // 2
+        for _ in range(self.MAX_STALE_GRABS - 1):
+            start = time.monotonic_ns()
+            if not self._grab_frame(cap):
+                return False
+            if time.monotonic_ns() - start >= threshold:
+                return True
+            self.stats.frames_skipped += 1
+        return self._grab_frame(cap)
+
+    def _retrieve_frame(
+        self, cap: Optional[cv2.VideoCapture], dst: Optional[np.ndarray] = None
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        """grab済みフレームのデコード（dst を指定するとそのバッファに書き込む）"""
+        if not cap:
+            return False, None
+        return cap.retrieve(dst)
+
+    def _process_frame(self, frame: np.ndarray) -> None:
+        """フレームのエンコードと購読者への配信"""
+        current_time = time.monotonic()
+        self.last_frame_time = time.monotonic_ns()
+        # 統計はキャプチャスレッドだけが更新する
+        self.stats.frames_captured += 1
+
+        # 1フレームにつき1回だけエンコードし、JPEGを全員で共有する
+        # （差し替えは参照の代入なのでロック不要）
+        jpeg = self.encode_jpeg(frame)
+        if jpeg is not None:
+            self._latest = (jpeg, current_time, next(self._latest_seq))
+            self._notify_subscribers()
+
+    def _notify_subscribers(self) -> None:
+        """購読者に新しいフレームを通知（キャプチャスレッドから呼ぶ）"""
+        loop = self._loop
+        if self._subscribers and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake_subscribers)
+
+    def _wake_subscribers(self) -> None:
+        """全購読者のイベントをセット（イベントループ上で実行される）"""
+        for event in self._subscribers:
+            event.set()
+
+    def subscribe(self) -> asyncio.Event:
+        """フレーム配信の購読開始（イベントループ上で呼ぶこと）"""
+        self._loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        self._subscribers.add(event)
+        return event
+
+    def unsubscribe(self, event: asyncio.Event) -> None:
+        """フレーム配信の購読終了"""
+        self._subscribers.discard(event)
+
+    async def wait_frame(
+        self, event: asyncio.Event, max_age: Optional[float] = None, timeout: float = 1.0
+    ) -> Optional[tuple[bytes, float, int]]:
+        """新しいフレームが届くまで待機し、最新フレームのJPEGを返す（タイムアウト時や max_age 秒より古い場合は None）"""
         try:
-            self.frame_queue.put_nowait((frame, current_time))
-        except queue.Full:
-            self.stats['frames_dropped'] += 1
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        event.clear()
+        if not self.is_running.is_set():
+            return None
 
-    def _handle_capture_failure(self):
-        """キャプチャ失敗時の処理"""
-        self.logger.warning("Frame capture failed")
-        self.is_connected.clear()
-        self.stats['connection_errors'] += 1
+        frame_data = self._latest
+        if max_age is not None and frame_data is not None and time.monotonic() - frame_data[1] > max_age:
+            return None
+        return frame_data
 
+    def _handle_capture_failure(self, gen: int) -> None:
+        """キャプチャ失敗時の処理"""
         with self.lock:
+            # 失敗中に stop() 等で self.cap が差し替えられていれば何もしない
+            if gen != self._cap_gen:
+                return
+
+            self.logger.warning("Frame capture failed")
+            self.is_connected.clear()
+            self.stats.connection_errors += 1
+
             if self.cap:
                 self.cap.release()
                 self.cap = None
+                self._cap_gen += 1
 
-    def _attempt_reconnect(self):
+    def _attempt_reconnect(self) -> None:
         """再接続試行"""
         if self.reconnect_attempts >= self.config.max_reconnect_attempts:
             self.logger.error("Max reconnection attempts reached")
@@ -199,36 +451,72 @@ class CameraManager:
             return
 
         self.reconnect_attempts += 1
-        self.logger.info(f"Attempting to reconnect ({self.reconnect_attempts}/{self.config.max_reconnect_attempts})")
-
-        time.sleep(self.config.reconnect_interval)
+        self.logger.info(
+            "Attempting to reconnect (%d/%d)", self.reconnect_attempts, self.config.max_reconnect_attempts
+        )
+
+        # ジッター付き指数バックオフ（複数インスタンスの再接続が同期しないようにする）
+        delay = min(
+            self.config.reconnect_interval * (2 ** (self.reconnect_attempts - 1)),
+            self.config.max_reconnect_interval
+        ) * (0.5 + random.random() * 0.5)
+        if self.stop_requested.wait(delay):
+            return
 
         if self._initialize_camera():
             self.logger.info("Reconnection successful")
-            from datetime import datetime
-            self.stats['last_reconnect'] = datetime.now().isoformat()
+            self.stats.last_reconnect = time.time()
         else:
             self.logger.warning("Reconnection failed")
 
-    def get_frame(self) -> Optional[tuple]:
-        """最新フレームの取得"""
-        try:
-            return self.frame_queue.get(timeout=1.0)
-        except queue.Empty:
-            return None
+    def encode_jpeg(self, frame: np.ndarray) -> Optional[bytes]:
+        """フレームのJPEGエンコード"""
+        # MJPEGパススルーで受け取ったフレームは既にJPEGデータ（1行のバイト列として返る）
+        if frame.ndim < 3:
+            return frame.tobytes()
+
+        if _turbojpeg is not None:
+            # クロマは4:2:0でサブサンプリングする（PyTurboJPEGの既定は4:2:2、OpenCVの既定と揃える）
+            return _turbojpeg.encode(
+                frame, quality=self.config.jpeg_quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420
+            )
+
+        ret, buffer = cv2.imencode('.jpg', frame, self._imencode_params)
+        return buffer.tobytes() if ret else None
+
+    def get_status_bytes(self) -> bytes:
+        """カメラステータスのJSONバイト列取得（STATUS_CACHE_TTL 秒間キャッシュ）"""
+        now = time.monotonic()
+        cached_at, body = self._status_cache
+        if now - cached_at < self.STATUS_CACHE_TTL:
+            return body
+
+        status = self.get_status()
+        if orjson is not None:
+            body = orjson.dumps(status)
+        else:
+            body = json.dumps(status, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._status_cache = (now, body)
+        return body
 
     def get_status(self) -> Dict[str, Any]:
         """カメラステータス取得"""
-        current_time = time.time()
+        now_ns = time.monotonic_ns()
         return {
             'is_running': self.is_running.is_set(),
             'is_connected': self.is_connected.is_set(),
-            'queue_size': self.frame_queue.qsize(),
+            'subscribers': len(self._subscribers),
             'reconnect_attempts': self.reconnect_attempts,
             'stats': {
-                **self.stats,
-                'uptime': current_time - self.stats['uptime_start'],
-                'last_frame_age': current_time - self.last_frame_time if self.last_frame_time else None
+                **asdict(self.stats),
+                'last_reconnect': (
+                    datetime.fromtimestamp(self.stats.last_reconnect).isoformat()
+                    if self.stats.last_reconnect else None
+                ),
+                # uptime_start は従来通りエポック秒で返す（内部の monotonic_ns 値は外部に出さない）
+                'uptime_start': self._started_at,
+                'uptime': (now_ns - self.stats.uptime_start) / 1e9,
+                'last_frame_age': (now_ns - self.last_frame_time) / 1e9 if self.last_frame_time else None
             },
-            'config': asdict(self.config)
+            'config': self._config_dict
         }
\ No newline at end of file
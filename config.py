@@ -1,13 +1,21 @@
 import json
 import os
+import tempfile
+from threading import RLock
 from pathlib import Path
 from typing import Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 
 from logging_config import get_logger
 
+# orjson が利用可能なら高速なJSONパーサー/シリアライザーを使う
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+
+@dataclass(slots=True)
 class CameraConfig:
     """カメラ設定"""
     device_index: int = 0
@@ -15,14 +23,18 @@ class CameraConfig:
     width: int = 640
     height: int = 480
     fps: int = 30
-    buffer_size: int = 2
-    jpeg_quality: int = 80
+    jpeg_quality: int = 75
+    mjpeg_passthrough: bool = False  # カメラのMJPEGをデコード・再エンコードせずに配信
+    gstreamer: bool = False  # GStreamer の v4l2src パイプラインでキャプチャ（GStreamer対応のOpenCVが必要）
+    capture_cpu: Optional[int] = None  # キャプチャスレッドを固定するCPU番号（負数は末尾から、null で固定しない）
+    capture_rt_priority: int = 0  # キャプチャスレッドの SCHED_FIFO 優先度（0 で通常スケジューリング、要 CAP_SYS_NICE）
     auto_reconnect: bool = True
     reconnect_interval: int = 5
+    max_reconnect_interval: int = 60  # 指数バックオフの上限（秒）
     max_reconnect_attempts: int = 10
 
 
-@dataclass
+@dataclass(slots=True)
 class ServerConfig:
     """サーバー設定"""
     host: str = "0.0.0.0"
@@ -32,6 +44,7 @@ class ServerConfig:
     cors_origins: list = None
     trusted_hosts: list = None
     max_frame_age: int = 5  # 秒
+    access_log: bool = False  # リクエストごとのアクセスログ出力
 
     def __post_init__(self):
         if self.cors_origins is None:
@@ -40,7 +53,7 @@ class ServerConfig:
             self.trusted_hosts = ["*"]
 
 
-@dataclass
+@dataclass(slots=True)
 class AppConfig:
     """アプリケーション設定"""
     camera: CameraConfig
@@ -53,75 +66,158 @@ class ConfigManager:
     def __init__(self, config_path: str = "config.json"):
         self.config_path = Path(config_path)
         self.logger = get_logger(f"{__name__}.ConfigManager")
+        # 設定の読み込み・保存・更新を直列化する（PUT /config はワーカースレッドで並行に、
+        # SIGHUP や再読み込みAPIからも呼ばれるため）。update_config() が save_config() を呼ぶので再入可能にする
+        self._lock = RLock()
+        # 最後に読み書きした設定ファイルの (st_mtime_ns, st_size) と設定内容
+        self._loaded: Optional[tuple[tuple[int, int], AppConfig]] = None
+        # GET /config 用のシリアライズ済み設定 (元の設定オブジェクト, JSON)
+        # 設定は更新のたびに新しいオブジェクトに差し替わるため、同一性で有効性を判定する
+        self._json_cache: Optional[tuple[AppConfig, bytes]] = None
+        # 設定内容が変わるたびに増える番号（変更検出を整数比較で行うため）
+        self.version = 0
         self.config = self.load_config()
 
     def load_config(self) -> AppConfig:
-        """設定ファイルの読み込み"""
-        if self.config_path.exists():
+        """設定ファイルの読み込み（前回から変更がなければ再パースしない）"""
+        with self._lock:
+            if self.config_path.exists():
+                try:
+                    st = self.config_path.stat()
+                    file_key = (st.st_mtime_ns, st.st_size)
+                    if self._loaded is not None and self._loaded[0] == file_key:
+                        return self._loaded[1]
+
+                    if orjson is not None:
+                        data = orjson.loads(self.config_path.read_bytes())
+                    else:
+                        with open(self.config_path, 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+
+                    camera_config = self._build_section(CameraConfig, data.get('camera', {}))
+                    server_config = self._build_section(ServerConfig, data.get('server', {}))
+                    config = AppConfig(camera=camera_config, server=server_config)
+                    self._loaded = (file_key, config)
+                    return config
+
+                except Exception as e:
+                    self.logger.warning(f"Failed to load config from {self.config_path}: {e}")
+                    self.logger.info("Using default configuration")
+
+            # デフォルト設定で新しい設定ファイルを作成
+            config = AppConfig(
+                camera=CameraConfig(),
+                server=ServerConfig()
+            )
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                camera_config = CameraConfig(**data.get('camera', {}))
-                server_config = ServerConfig(**data.get('server', {}))
-                return AppConfig(camera=camera_config, server=server_config)
-
-            except Exception as e:
-                self.logger.warning(f"Failed to load config from {self.config_path}: {e}")
-                self.logger.info("Using default configuration")
-
-        # デフォルト設定で新しい設定ファイルを作成
-        config = AppConfig(
-            camera=CameraConfig(),
-            server=ServerConfig()
-        )
-        self.save_config(config)
-        return config
+                self.save_config(config)
+            except OSError:
+                # 書き込めなくてもデフォルト設定で起動は続行する（エラーは save_config() で記録済み）
+                pass
+            return config
+
+    def _build_section(self, cls, data: dict):
+        """設定セクションの生成（未知のキーは警告して無視）"""
+        names = {f.name for f in fields(cls)}
+        unknown = data.keys() - names
+        if unknown:
+            self.logger.warning(f"Ignoring unknown {cls.__name__} keys: {', '.join(sorted(unknown))}")
+        return cls(**{key: value for key, value in data.items() if key in names})
 
     def save_config(self, config: AppConfig):
-        """設定ファイルの保存"""
-        try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'camera': asdict(config.camera),
-                    'server': asdict(config.server)
-                }, f, indent=2, ensure_ascii=False)
+        """設定ファイルの保存（失敗時は OSError を呼び出し元へ送出する）"""
+        with self._lock:
+            # orjson はdataclassを直接シリアライズできるため asdict() による辞書化を省く
+            if orjson is not None:
+                payload = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(asdict(config), indent=2, ensure_ascii=False).encode('utf-8')
+
+            # 書き込み途中のファイルを読まれないよう、同じディレクトリの一意な一時ファイルに
+            # 書いてディスクへ同期してから置き換える
+            tmp_name = None
+            try:
+                # mkstemp は 0600 で作成するので、既存ファイル（なければ 0644）の権限に揃える
+                try:
+                    mode = self.config_path.stat().st_mode & 0o777
+                except FileNotFoundError:
+                    mode = 0o644
+                fd, tmp_name = tempfile.mkstemp(
+                    dir=self.config_path.parent, prefix=self.config_path.name + '.', suffix='.tmp'
+                )
+                with os.fdopen(fd, 'wb') as f:
+                    os.chmod(tmp_name, mode)
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_name, self.config_path)
+            except OSError as e:
+                self.logger.error(f"Failed to save config: {e}")
+                if tmp_name is not None:
+                    try:
+                        os.unlink(tmp_name)
+                    except OSError:
+                        pass
+                raise
+
+            st = self.config_path.stat()
+            self._loaded = ((st.st_mtime_ns, st.st_size), config)
             self.logger.info(f"Configuration saved to {self.config_path}")
-        except Exception as e:
-            self.logger.error(f"Failed to save config: {e}")
 
     def reload_config(self) -> AppConfig:
         """設定ファイルの再読み込み"""
-        old_config = self.config
-        self.config = self.load_config()
+        with self._lock:
+            old_config = self.config
+            config = self.load_config()
+
+            # ファイルが変わっていなければ load_config() は同じオブジェクトを返すので、
+            # 内容の比較はファイルが更新された場合だけ行う
+            if config is not old_config and config != old_config:
+                self.config = config
+                self.version += 1
+                self.logger.info("Configuration updated successfully")
+            else:
+                self.logger.info("No configuration changes detected")
 
-        if old_config != self.config:
-            self.logger.info("Configuration updated successfully")
-        else:
-            self.logger.info("No configuration changes detected")
+            return self.config
+
+    def get_config_json(self) -> bytes:
+        """現在の設定のJSONバイト列取得（キャッシュ済みならそれを返す）"""
+        # update_config() は別スレッドから呼ばれうるので、参照は一度だけ取り出す
+        config = self.config
+        cached = self._json_cache
+        if cached is not None and cached[0] is config:
+            return cached[1]
 
-        return self.config
+        if orjson is not None:
+            body = orjson.dumps(config)
+        else:
+            body = json.dumps(asdict(config), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._json_cache = (config, body)
+        return body
 
     def update_config(self, new_config_data: dict) -> AppConfig:
         """設定の更新"""
-        # 設定検証とマージ
-        current = asdict(self.config)
-
-        # ネストした辞書をマージ
-        for key, value in new_config_data.items():
-            if key in current and isinstance(current[key], dict) and isinstance(value, dict):
-                current[key].update(value)
-            else:
-                current[key] = value
-
-        # 新しい設定でConfigオブジェクト作成
-        updated_config = AppConfig(
-            camera=CameraConfig(**current['camera']),
-            server=ServerConfig(**current['server'])
-        )
-
-        # 設定保存
-        self.save_config(updated_config)
-        self.config = updated_config
-
-        return self.config
\ No newline at end of file
+        with self._lock:
+            # 設定検証とマージ
+            current = asdict(self.config)
+
+            # ネストした辞書をマージ
+            for key, value in new_config_data.items():
+                if key in current and isinstance(current[key], dict) and isinstance(value, dict):
+                    current[key].update(value)
+                else:
+                    current[key] = value
+
+            # 新しい設定でConfigオブジェクト作成（廃止された項目などの未知のキーは警告して無視）
+            updated_config = AppConfig(
+                camera=self._build_section(CameraConfig, current['camera']),
+                server=self._build_section(ServerConfig, current['server'])
+            )
+
+            # 設定保存
+            self.save_config(updated_config)
+            self.config = updated_config
+            self.version += 1
+
+            return self.config
\ No newline at end of file
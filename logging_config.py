@@ -1,11 +1,55 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional
 
+# ログファイルのローテーション設定
+LOG_FILE_MAX_BYTES = 10_000_000
+LOG_FILE_BACKUP_COUNT = 5
+
+# ログ出力スレッド（setup_logging で開始、stop_logging で停止）
+_queue_listener: Optional[QueueListener] = None
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """レコードごとの flush を行わないローテーション付きファイルハンドラー
+
+    一定件数ごと、または WARNING 以上のレコードでのみ flush する。
+    """
+
+    def __init__(self, *args, flush_interval: int = 100, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_interval = flush_interval
+        self._pending = 0
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+
+            self._pending += 1
+            if record.levelno >= logging.WARNING or self._pending >= self.flush_interval:
+                self.flush()
+                self._pending = 0
+        except Exception:
+            self.handleError(record)
+
 
 def setup_logging(log_level: str, log_file: Optional[str] = None):
     """ロギングの設定"""
+    global _queue_listener
+
     level = getattr(logging, log_level.upper(), logging.INFO)
 
+    # フォーマットで使わないスレッド/プロセス情報の取得をログレコード生成時に省略
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
     # ログフォーマット
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -20,20 +64,60 @@ def setup_logging(log_level: str, log_file: Optional[str] = None):
     # ファイルハンドラー
     if log_file:
         try:
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler = BufferedRotatingFileHandler(
+                log_file,
+                maxBytes=LOG_FILE_MAX_BYTES,
+                backupCount=LOG_FILE_BACKUP_COUNT,
+                encoding='utf-8',
+                delay=True
+            )
             file_handler.setFormatter(formatter)
             handlers.append(file_handler)
         except Exception as e:
             print(f"Warning: Failed to setup file logging: {e}")
 
+    # 再設定時は既存の出力スレッドを止めてから差し替える
+    stop_logging()
+
+    # 実際のI/Oは専用スレッドで行い、キャプチャスレッド等はキューへの追加だけで済ませる
+    log_queue = queue.SimpleQueue()
+    _queue_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+
+    # 整形は出力側のハンドラーで行うため、キューにはメッセージ本文のみを渡す
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
     # ルートロガー設定
     logging.basicConfig(
         level=level,
-        handlers=handlers,
+        handlers=[queue_handler],
         force=True
     )
 
 
+def stop_logging():
+    """ログ出力スレッドの停止（キューに残ったログは出力される）"""
+    global _queue_listener
+
+    if _queue_listener is None:
+        return
+
+    listener, _queue_listener = _queue_listener, None
+    listener.stop()
+
+    # 以降のログは呼び出し元スレッドで直接出力する
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
+
+
+atexit.register(stop_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """ロガー取得のヘルパー関数"""
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
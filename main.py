@@ -1,19 +1,27 @@
-import cv2
+import asyncio
+import gzip
+import hashlib
 import os
 import time
 from datetime import datetime
 from typing import Optional
 from contextlib import asynccontextmanager
-from threading import Thread
 
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import uvicorn
 
+# orjson が利用可能ならレスポンスのJSONシリアライズに使う
+try:
+    import orjson  # noqa: F401  ORJSONResponse の実行時に必要
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
 from config import ConfigManager
-from logging_config import setup_logging, get_logger
+from logging_config import setup_logging, stop_logging, get_logger
 from camera import CameraManager
 from signal_handler import SignalHandler
 
@@ -26,6 +34,11 @@ config_manager = ConfigManager()
 camera_manager: Optional[CameraManager] = None
 signal_handler = SignalHandler()
 
+# 終了時にキャプチャスレッドの停止を待つ上限（秒）
+CAMERA_STOP_TIMEOUT = 2.0
+# 終了時に処理中のリクエストの完了を待つ上限（秒）。超えた場合は打ち切って終了する
+GRACEFUL_SHUTDOWN_TIMEOUT = 5.0
+
 # ===== FastAPI setup =====
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -36,8 +49,11 @@ async def lifespan(app: FastAPI):
     main_logger.info("Starting camera stream server...")
     
     try:
+        # リクエストごとのファイル読み込み・圧縮を避けるため起動時に一度だけ読み込む
+        app.state.index_page = load_index_page()
+
         # シグナルハンドラーの設定
-        signal_handler.setup_signal_handlers()
+        signal_handler.setup_signal_handlers(asyncio.get_running_loop())
         signal_handler.set_config_manager(config_manager)
 
         # カメラマネージャー初期化
@@ -54,7 +70,7 @@ async def lifespan(app: FastAPI):
         main_logger.info("Server startup completed")
 
     except Exception as e:
-        main_logger.error(f"Error during server startup: {e}")
+        main_logger.error("Error during server startup: %s", e)
         # 起動時エラーでもサーバーは継続（カメラなしでも管理機能は提供）
     
     yield
@@ -64,21 +80,21 @@ async def lifespan(app: FastAPI):
     
     try:
         if camera_manager:
-            camera_manager.stop()
+            # スレッドの join やデバイスの解放でイベントループを塞がないよう別スレッドで停止する
+            await asyncio.to_thread(camera_manager.stop, CAMERA_STOP_TIMEOUT)
         main_logger.info("Server shutdown completed")
         
     except Exception as e:
-        main_logger.error(f"Error during server shutdown: {e}")
+        main_logger.error("Error during server shutdown: %s", e)
     
     finally:
-        # 確実にリソースを解放
-        cv2.destroyAllWindows()  # OpenCVウィンドウのクリーンアップ
         main_logger.info("Resource cleanup completed")
 
 app = FastAPI(
     title="Production USB Camera Stream",
     description="High-reliability USB camera streaming service",
     version="2.0.0",
+    default_response_class=DefaultResponse,
     lifespan=lifespan
 )
 
@@ -105,116 +121,249 @@ def get_camera_manager() -> CameraManager:
     return camera_manager
 
 # ===== フレーム生成 =====
-def generate_frames(camera: CameraManager):
-    """フレーム生成ジェネレーター"""
+# multipart/x-mixed-replace の各パート（1フレームにつき1回の送信で済むようまとめて組み立てる）
+FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+CAMERA_UNAVAILABLE_CHUNK = b'--frame\r\nContent-Type: text/plain\r\n\r\nCamera not available\r\n'
+ERROR_CHUNK = b'--frame\r\nContent-Type: text/plain\r\n\r\nError\r\n'
+# エラーが続いてもログが溢れないよう、1接続あたりのエラーログ出力間隔（秒）を制限する
+ERROR_LOG_INTERVAL = 1.0
+
+# 直近に組み立てたパート (JPEG, パート全体)。同じフレームを受け取った他のクライアントは組み立て済みのパートを再利用する
+_frame_part: tuple[bytes, bytes] = (b'', b'')
+
+async def generate_frames(camera: CameraManager):
+    """フレーム生成ジェネレーター（各クライアントがエンコード済みの最新フレームを共有して受け取る）"""
+    global _frame_part
+    # ループ内の属性探索を避けるためローカル変数に束縛
     max_frame_age = config_manager.config.server.max_frame_age
-    
-    while True:
-        try:
-            frame_data = camera.get_frame()
-            
-            if frame_data is None:
-                # カメラが利用できない場合のプレースホルダー
-                yield b'--frame\r\n'
-                yield b'Content-Type: text/plain\r\n\r\n'
-                yield b'Camera not available\r\n'
-                time.sleep(0.1)
-                continue
-            
-            frame, timestamp = frame_data
-            
-            # フレームの新鮮度チェック
-            if time.time() - timestamp > max_frame_age:
-                continue
-            
-            # JPEGエンコード
-            ret, buffer = cv2.imencode(
-                '.jpg', 
-                frame, 
-                [cv2.IMWRITE_JPEG_QUALITY, camera.config.jpeg_quality]
-            )
-            
-            if ret:
-                frame_bytes = buffer.tobytes()
-                yield b'--frame\r\n'
-                yield b'Content-Type: image/jpeg\r\n\r\n'
-                yield frame_bytes
-                yield b'\r\n'
-            
-        except Exception as e:
-            main_logger.error(f"Error generating frame: {e}")
-            yield b'--frame\r\n'
-            yield b'Content-Type: text/plain\r\n\r\n'
-            yield f'Error: {str(e)}\r\n'.encode()
-            time.sleep(0.1)
+    wait_frame = camera.wait_frame
+    frame_header = FRAME_HEADER
+    # シャットダウン開始後はストリームを終了し、uvicornが接続を閉じられるようにする
+    shutting_down = signal_handler.shutdown_event.is_set
+    event = camera.subscribe()
+    last_seq = 0
+    last_error_log = 0.0
+    suppressed_errors = 0
+
+    try:
+        while not shutting_down():
+            # 例外処理はフレームごとではなく、エラー発生時にだけ内側のループを抜けて行う
+            try:
+                while not shutting_down():
+                    # 古すぎるフレームは wait_frame 側で除外される
+                    frame_data = await wait_frame(event, max_frame_age)
+
+                    if frame_data is None:
+                        # カメラが利用できない場合のプレースホルダー
+                        yield CAMERA_UNAVAILABLE_CHUNK
+                        continue
+
+                    # JPEGはキャプチャスレッドで1回だけエンコードされ、全クライアントで共有される
+                    frame_bytes, _, seq = frame_data
+
+                    # 送信済みのフレームは再送しない
+                    if seq == last_seq:
+                        continue
+                    last_seq = seq
+
+                    # JPEG はフレームごとに共有される同一オブジェクトなので、同一性で判定できる
+                    cached_jpeg, part = _frame_part
+                    if cached_jpeg is not frame_bytes:
+                        part = b''.join((frame_header % len(frame_bytes), frame_bytes, b'\r\n'))
+                        _frame_part = (frame_bytes, part)
+                    yield part
+
+            except Exception as e:
+                # 例外の詳細はクライアントに返さずログにだけ残す
+                now = time.monotonic()
+                if now - last_error_log >= ERROR_LOG_INTERVAL:
+                    logger.error("Error generating frame: %s (%d similar errors suppressed)", e, suppressed_errors)
+                    last_error_log = now
+                    suppressed_errors = 0
+                else:
+                    suppressed_errors += 1
+                yield ERROR_CHUNK
+                await asyncio.sleep(0.1)
+    finally:
+        camera.unsubscribe(event)
+
+# ===== メインページ =====
+def load_index_page() -> Optional[dict[str, tuple[bytes, dict[str, str]]]]:
+    """メインページの読み込み（生データとgzip圧縮済みデータ、それぞれのレスポンスヘッダー）"""
+    try:
+        with open("templates/index.html", "rb") as f:
+            html_bytes = f.read()
+    except FileNotFoundError:
+        logger.error("Template file templates/index.html not found")
+        return None
+
+    # ETag は表現ごとに異なる値にする（gzip 版は末尾に -gzip を付ける）
+    etag = hashlib.sha1(html_bytes).hexdigest()[:16]
+    headers = {"Cache-Control": "max-age=3600", "ETag": f'"{etag}"', "Vary": "Accept-Encoding"}
+    gzip_headers = {**headers, "ETag": f'"{etag}-gzip"', "Content-Encoding": "gzip"}
+    return {
+        "identity": (html_bytes, headers),
+        "gzip": (gzip.compress(html_bytes, 9), gzip_headers),
+    }
 
 # ===== APIエンドポイント =====
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Accept-Encoding ヘッダーで gzip が受け入れられるか判定（q=0 は拒否として扱う）"""
+    wildcard_q = None
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == "gzip":
+            return q > 0
+        if name == "*":
+            wildcard_q = q
+    # gzip が明示されていなければ * の指定に従う
+    return wildcard_q is not None and wildcard_q > 0
+
 @app.get("/", response_class=HTMLResponse)
-async def index():
+async def index(request: Request):
     """メインページ"""
-    try:
-        with open("templates/index.html", "r", encoding="utf-8") as f:
-            html_content = f.read()
-        return HTMLResponse(content=html_content)
-    except FileNotFoundError:
+    index_page = getattr(request.app.state, "index_page", None)
+    if index_page is None:
         raise HTTPException(status_code=500, detail="Template file not found")
 
-@app.get("/video_feed")
-async def video_feed(camera: CameraManager = Depends(get_camera_manager)):
-    """ビデオストリーミングエンドポイント"""
-    if not camera.is_running.is_set():
-        raise HTTPException(status_code=503, detail="Camera service not running")
-    
-    return StreamingResponse(
-        generate_frames(camera),
-        media_type="multipart/x-mixed-replace; boundary=frame",
-        headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0"
-        }
-    )
+    encoding = "gzip" if accepts_gzip(request.headers.get("accept-encoding", "")) else "identity"
+    content, headers = index_page[encoding]
+
+    # ブラウザのキャッシュが最新なら本文を返さない
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=content, headers=headers)
+
+# ===== ビデオストリーミング =====
+VIDEO_FEED_HEADERS = [
+    (b"content-type", b"multipart/x-mixed-replace; boundary=frame"),
+    (b"cache-control", b"no-cache, no-store, must-revalidate"),
+    (b"pragma", b"no-cache"),
+    (b"expires", b"0"),
+]
+
+class VideoFeedEndpoint:
+    """ビデオストリーミングエンドポイント（StreamingResponse を介さずASGIで直接送信）"""
+
+    async def __call__(self, scope, receive, send):
+        camera = camera_manager
+        if not camera:
+            response = JSONResponse({"detail": "Camera manager not initialized"}, status_code=503)
+            await response(scope, receive, send)
+            return
+        if not camera.is_running.is_set():
+            response = JSONResponse({"detail": "Camera service not running"}, status_code=503)
+            await response(scope, receive, send)
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": VIDEO_FEED_HEADERS})
+        if scope["method"] == "HEAD":
+            # HEAD はヘッダーのみ返す（ストリームは終わらないため本文は送らない）
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        # アクセスログの代わりに、ストリームの開始・終了時にだけ1行ずつ出力する
+        # scope["client"] はサーバーによってタプルでもリストでもありうる
+        peer = scope.get("client")
+        client = f"{peer[0]}:{peer[1]}" if peer else "unknown"
+        logger.info("Video stream opened: %s", client)
+
+        # 切断後の send() は何もせずに戻るため、receive() 側で切断を検知して配信を止める
+        stream_task = asyncio.create_task(self._stream(camera, send))
+        disconnect_task = asyncio.create_task(self._wait_disconnect(receive))
+        try:
+            await asyncio.wait((stream_task, disconnect_task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stream_task.cancel()
+            disconnect_task.cancel()
+            await asyncio.gather(stream_task, disconnect_task, return_exceptions=True)
+            logger.info("Video stream closed: %s", client)
+
+    @staticmethod
+    async def _stream(camera: CameraManager, send):
+        """フレームを multipart のパートとして送信し続ける"""
+        frames = generate_frames(camera)
+        # フレームごとの辞書生成を避けるため、同じメッセージの body だけを差し替えて送る
+        message = {"type": "http.response.body", "body": b"", "more_body": True}
+        try:
+            async for chunk in frames:
+                message["body"] = chunk
+                await send(message)
+        finally:
+            await frames.aclose()
+        # サーバー終了時などジェネレーターが終わった場合はレスポンスを完了させる
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        """クライアントの切断を待機"""
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+# Starlette のルートとして登録するため /docs（OpenAPI）には表示されない
+app.add_route("/video_feed", VideoFeedEndpoint(), methods=["GET", "HEAD"])
 
 @app.get("/status")
 async def get_status(camera: CameraManager = Depends(get_camera_manager)):
     """システム状態取得"""
-    return JSONResponse(camera.get_status())
+    return Response(content=camera.get_status_bytes(), media_type="application/json")
+
+# ヘルスチェック応答（秒単位のタイムスタンプ, JSONバイト列）
+# 監視から頻繁に呼ばれるため、タイムスタンプが変わった時だけ組み立て直す
+_health_body: tuple[int, bytes] = (0, b'')
 
 @app.get("/health")
 async def health_check():
     """ヘルスチェックエンドポイント"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    global _health_body
+    now = int(time.time())
+    ts, body = _health_body
+    if ts != now:
+        timestamp = datetime.fromtimestamp(now).isoformat()
+        body = b'{"status":"healthy","timestamp":"%s"}' % timestamp.encode()
+        _health_body = (now, body)
+    return Response(content=body, media_type="application/json")
 
 @app.post("/camera/restart")
 async def restart_camera(camera: CameraManager = Depends(get_camera_manager)):
     """カメラ再起動"""
+    main_logger.info("API camera restart requested")
     try:
-        main_logger.info("API camera restart requested")
-        camera.stop()
-        time.sleep(2)  # デバイスの安定化待機
-        success = camera.start()
-        
-        message = "Camera restart successful" if success else "Camera restart failed"
-        main_logger.info(message)
-        
-        return {"success": success, "message": message}
-        
+        # SIGUSR2 と同じ再起動処理・ロックを使い、再起動の重複実行を防ぐ
+        # （camera の依存はカメラ未初期化時に 503 を返すために残している）
+        success = await signal_handler.restart_camera()
     except Exception as e:
         error_msg = f"Camera restart failed: {str(e)}"
         main_logger.error(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
+    if success is None:
+        raise HTTPException(status_code=409, detail="Camera restart already in progress")
+
+    message = "Camera restart successful" if success else "Camera restart failed"
+    main_logger.info(message)
+    return {"success": success, "message": message}
+
 @app.post("/server/reload-config")
 async def reload_config():
     """設定ファイル再読み込み"""
     try:
         main_logger.info("Configuration reload requested")
-        global config_manager
-        old_config = config_manager.config
-        config_manager.reload_config()
+        old_version = config_manager.version
+        # 設定の更新中はロック待ちになりうるため、イベントループ外で読み込む
+        await asyncio.to_thread(config_manager.reload_config)
         
         # 設定変更をログに記録
-        if old_config != config_manager.config:
+        if old_version != config_manager.version:
             main_logger.info("Configuration updated successfully")
         else:
             main_logger.info("No configuration changes detected")
@@ -230,53 +379,66 @@ async def reload_config():
         main_logger.error(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
+# 実行中のシャットダウンタスク（タスクが途中で破棄されないよう参照を保持する）
+_shutdown_task: Optional[asyncio.Task] = None
+
+async def _delayed_shutdown(delay: float):
+    """指定秒数待機してからグレースフルシャットダウンを実行"""
+    await asyncio.sleep(delay)
+    signal_handler._perform_graceful_shutdown()
+
 @app.post("/server/shutdown")
 async def graceful_shutdown():
     """グレースフルシャットダウン"""
+    global _shutdown_task
     main_logger.info("Graceful shutdown requested via API")
-    
-    # 非同期でシャットダウンを実行
-    def delayed_shutdown():
-        time.sleep(1)  # レスポンスを返すための短い遅延
-        signal_handler._perform_graceful_shutdown()
-    
-    Thread(target=delayed_shutdown, daemon=True).start()
-    
+
+    # レスポンスを返してからシャットダウンするよう少し遅延させて実行
+    _shutdown_task = asyncio.create_task(_delayed_shutdown(1.0))
+
     return {"message": "Graceful shutdown initiated"}
 
+# プロセス情報は実行中に変わらないため起動時に一度だけ組み立てる
+PROCESS_INFO = {
+    "pid": os.getpid(),
+    "signals": {
+        "SIGINT": "Graceful shutdown (Ctrl+C)",
+        "SIGTERM": "Graceful shutdown (kill)",
+        "SIGHUP": "Reload configuration (kill -HUP)",
+        "SIGUSR1": "Output statistics (kill -USR1)",
+        "SIGUSR2": "Restart camera (kill -USR2)"
+    } if os.name != 'nt' else {
+        "SIGINT": "Graceful shutdown (Ctrl+C)",
+        "SIGTERM": "Graceful shutdown"
+    }
+}
+# リクエストごとのシリアライズを省くため、JSONバイト列も一度だけ生成しておく
+PROCESS_INFO_JSON = DefaultResponse(PROCESS_INFO).body
+
 @app.get("/server/pid")
 async def get_process_info():
     """プロセス情報取得"""
-    return {
-        "pid": os.getpid(),
-        "signals": {
-            "SIGINT": "Graceful shutdown (Ctrl+C)",
-            "SIGTERM": "Graceful shutdown (kill)",
-            "SIGHUP": "Reload configuration (kill -HUP)",
-            "SIGUSR1": "Output statistics (kill -USR1)",
-            "SIGUSR2": "Restart camera (kill -USR2)"
-        } if os.name != 'nt' else {
-            "SIGINT": "Graceful shutdown (Ctrl+C)",
-            "SIGTERM": "Graceful shutdown"
-        }
-    }
+    return Response(content=PROCESS_INFO_JSON, media_type="application/json")
 
 @app.get("/config")
 async def get_config():
     """現在の設定取得"""
-    from dataclasses import asdict
-    return JSONResponse(asdict(config_manager.config))
+    return Response(content=config_manager.get_config_json(), media_type="application/json")
 
 @app.put("/config")
 async def update_config(new_config: dict):
     """設定更新"""
     try:
-        global config_manager
-        config_manager.update_config(new_config)
+        # 設定のマージ・検証・ファイル書き込みでイベントループを塞がないよう別スレッドで実行
+        await asyncio.to_thread(config_manager.update_config, new_config)
         return {"success": True, "message": "Configuration updated (restart required for some changes)"}
 
+    except OSError as e:
+        # 設定ファイルへの書き込み失敗はクライアントの入力ではなくサーバー側の問題
+        main_logger.error("Config save failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to save configuration: {str(e)}")
     except Exception as e:
-        main_logger.error(f"Config update failed: {e}")
+        main_logger.error("Config update failed: %s", e)
         raise HTTPException(status_code=400, detail=f"Invalid configuration: {str(e)}")
 
 # ===== メイン実行 =====
@@ -292,13 +454,13 @@ if __name__ == "__main__":
     main_logger.info("=" * 60)
     main_logger.info("Production USB Camera Stream Server v2.0")
     main_logger.info("=" * 60)
-    main_logger.info(f"Process ID: {os.getpid()}")
-    main_logger.info(f"Camera device: {config.camera.device_path}")
-    main_logger.info(f"Resolution: {config.camera.width}x{config.camera.height}")
-    main_logger.info(f"Server: http://{config.server.host}:{config.server.port}")
-    main_logger.info(f"Log level: {config.server.log_level}")
+    main_logger.info("Process ID: %d", os.getpid())
+    main_logger.info("Camera device: %s", config.camera.device_path)
+    main_logger.info("Resolution: %dx%d", config.camera.width, config.camera.height)
+    main_logger.info("Server: http://%s:%d", config.server.host, config.server.port)
+    main_logger.info("Log level: %s", config.server.log_level)
     if config.server.log_file:
-        main_logger.info(f"Log file: {config.server.log_file}")
+        main_logger.info("Log file: %s", config.server.log_file)
     
     # シグナル情報を表示
     if os.name != 'nt':  # Unix系システム
@@ -311,9 +473,9 @@ if __name__ == "__main__":
         main_logger.info("  SIGUSR2        : Restart camera")
         main_logger.info("")
         main_logger.info("Usage examples:")
-        main_logger.info(f"  kill -HUP {os.getpid()}   # Reload config")
-        main_logger.info(f"  kill -USR1 {os.getpid()}  # Show stats")
-        main_logger.info(f"  kill -USR2 {os.getpid()}  # Restart camera")
+        main_logger.info("  kill -HUP %d   # Reload config", os.getpid())
+        main_logger.info("  kill -USR1 %d  # Show stats", os.getpid())
+        main_logger.info("  kill -USR2 %d  # Restart camera", os.getpid())
     else:
         main_logger.info("")
         main_logger.info("Signal handling:")
@@ -331,7 +493,11 @@ if __name__ == "__main__":
             host=config.server.host,
             port=config.server.port,
             log_level=config.server.log_level.lower(),
-            access_log=True,
+            # uvloop / httptools がインストールされていれば使用される（未インストール時は asyncio / h11）
+            loop="auto",
+            http="auto",
+            access_log=config.server.access_log,
+            timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
             use_colors=True,
             server_header=False,  # Serverヘッダーを無効化
             date_header=False     # Dateヘッダーを無効化
@@ -348,13 +514,13 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         main_logger.info("Server stopped by user (KeyboardInterrupt)")
     except SystemExit as e:
-        main_logger.info(f"Server stopped with exit code: {e.code}")
+        main_logger.info("Server stopped with exit code: %s", e.code)
     except Exception as e:
-        main_logger.error(f"Server failed to start: {e}")
+        main_logger.error("Server failed to start: %s", e)
         sys.exit(1)
     finally:
         main_logger.info("Server process terminated")
         # 最終的なクリーンアップ
         if 'camera_manager' in globals() and camera_manager:
             camera_manager.stop()
-        cv2.destroyAllWindows()
\ No newline at end of file
+        stop_logging()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 import signal
 import sys
 import time
@@ -6,6 +7,12 @@ import atexit
 from threading import Event
 from typing import Optional
 
+# orjson が利用可能なら統計出力のシリアライズに使う
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from camera import CameraManager
 from logging_config import get_logger
 
@@ -20,6 +27,11 @@ class SignalHandler:
         self._config_manager = None
         self._server_handle = None
         self._cleanup_completed = False
+        # シグナルをイベントループ経由で処理している場合のループと、実行中のカメラ再起動タスク
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._restart_task: Optional[asyncio.Task] = None
+        # API と SIGUSR2 で共有するカメラ再起動のロック（再起動を同時に1つだけ実行する）
+        self._restart_lock = asyncio.Lock()
 
     def set_camera_manager(self, camera_manager: CameraManager):
         """カメラマネージャーを設定"""
@@ -33,32 +45,51 @@ class SignalHandler:
         """サーバーハンドルを設定"""
         self._server_handle = server_handle
 
-    def setup_signal_handlers(self):
-        """シグナルハンドラーのセットアップ"""
+    def setup_signal_handlers(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """シグナルハンドラーのセットアップ（loop を渡すとイベントループ上でハンドラーを実行する）"""
+        self._loop = loop
+
         # SIGINT (Ctrl+C)
-        signal.signal(signal.SIGINT, self._handle_shutdown_signal)
+        self._install_handler(signal.SIGINT, self._handle_shutdown_signal)
 
         # SIGTERM (kill コマンド)
-        signal.signal(signal.SIGTERM, self._handle_shutdown_signal)
+        self._install_handler(signal.SIGTERM, self._handle_shutdown_signal)
 
         # Unix系のみのシグナル
         if hasattr(signal, 'SIGHUP'):
             # SIGHUP (設定リロード)
-            signal.signal(signal.SIGHUP, self._handle_reload_signal)
+            self._install_handler(signal.SIGHUP, self._handle_reload_signal)
 
         if hasattr(signal, 'SIGUSR1'):
             # SIGUSR1 (統計情報出力)
-            signal.signal(signal.SIGUSR1, self._handle_stats_signal)
+            self._install_handler(signal.SIGUSR1, self._handle_stats_signal)
 
         if hasattr(signal, 'SIGUSR2'):
             # SIGUSR2 (カメラ再起動)
-            signal.signal(signal.SIGUSR2, self._handle_camera_restart_signal)
+            self._install_handler(signal.SIGUSR2, self._handle_camera_restart_signal)
 
         # プロセス終了時のクリーンアップ
         atexit.register(self._cleanup_on_exit)
 
         self.logger.info("Signal handlers configured")
 
+    def _install_handler(self, signum: int, handler):
+        """シグナルハンドラーの登録（可能ならイベントループ経由、それ以外は signal.signal）"""
+        if self._loop is not None:
+            try:
+                # ハンドラーは割り込み中ではなくイベントループのコールバックとして呼ばれる
+                self._loop.add_signal_handler(signum, handler, signum, None)
+                return
+            except (NotImplementedError, RuntimeError, ValueError) as e:
+                # Windows のイベントループは未対応、メインスレッド以外のループでは登録できない
+                self.logger.debug("add_signal_handler unavailable (%s), falling back to signal.signal", e)
+                self._loop = None
+        try:
+            signal.signal(signum, handler)
+        except ValueError as e:
+            # メインスレッド以外からは登録できない（起動処理は続行する）
+            self.logger.warning("Cannot install handler for %s: %s", signal.Signals(signum).name, e)
+
     def _handle_shutdown_signal(self, signum, frame):
         """シャットダウンシグナルハンドリング"""
         signal_name = signal.Signals(signum).name
@@ -67,10 +98,22 @@ class SignalHandler:
         if not self.shutdown_event.is_set():
             self.shutdown_event.set()
             self._perform_graceful_shutdown()
+        elif self._server_handle:
+            # 終了処理中に再度シグナルを受けたら、接続の終了を待たずに終了させる
+            self.logger.warning("Received %s again, forcing exit", signal_name)
+            self._server_handle.force_exit = True
 
     def _handle_reload_signal(self, signum, frame):
         """設定リロードシグナルハンドリング（SIGHUP）"""
         self.logger.info("Received SIGHUP signal, reloading configuration...")
+        if self._loop is not None:
+            # reload_config() は設定の更新と同じロックを取るため、イベントループを塞がないよう別スレッドで実行
+            self._loop.run_in_executor(None, self._reload_config)
+        else:
+            self._reload_config()
+
+    def _reload_config(self):
+        """設定の再読み込み"""
         try:
             if self._config_manager:
                 self._config_manager.reload_config()
@@ -85,14 +128,23 @@ class SignalHandler:
         self.logger.info("Received SIGUSR1 signal, outputting statistics...")
         if self._camera_manager:
             stats = self._camera_manager.get_status()
-            self.logger.info(f"Camera Statistics: {json.dumps(stats, indent=2, default=str)}")
+            if orjson is not None:
+                body = orjson.dumps(stats, default=str, option=orjson.OPT_INDENT_2).decode()
+            else:
+                body = json.dumps(stats, indent=2, default=str)
+            self.logger.info("Camera Statistics: %s", body)
         else:
             self.logger.warning("Camera manager not available for statistics")
 
     def _handle_camera_restart_signal(self, signum, frame):
         """カメラ再起動シグナルハンドリング（SIGUSR2）"""
         self.logger.info("Received SIGUSR2 signal, restarting camera...")
-        if self._camera_manager:
+        if self._restart_lock.locked() or (self._restart_task is not None and not self._restart_task.done()):
+            self.logger.warning("Camera restart already in progress")
+        elif self._camera_manager and self._loop is not None:
+            # イベントループ上ではブロッキングする停止・待機・開始を別タスクで行う
+            self._restart_task = self._loop.create_task(self._restart_camera())
+        elif self._camera_manager:
             try:
                 self._camera_manager.stop()
                 time.sleep(2)
@@ -103,26 +155,52 @@ class SignalHandler:
         else:
             self.logger.warning("Camera manager not available for restart")
 
+    async def restart_camera(self) -> Optional[bool]:
+        """カメラ再起動（デバイス操作はワーカースレッドで行い、イベントループを塞がない）
+
+        API と SIGUSR2 の両方から呼ばれる。再起動が実行中なら何もせず None を返す。
+        """
+        if self._restart_lock.locked():
+            return None
+        async with self._restart_lock:
+            await asyncio.to_thread(self._camera_manager.stop)
+            await asyncio.sleep(2)  # デバイスの安定化待機
+            return await asyncio.to_thread(self._camera_manager.start)
+
+    async def _restart_camera(self):
+        """SIGUSR2 によるカメラ再起動タスク"""
+        try:
+            success = await self.restart_camera()
+            if success is None:
+                self.logger.warning("Camera restart already in progress")
+            else:
+                self.logger.info(f"Camera restart {'successful' if success else 'failed'}")
+        except Exception as e:
+            self.logger.error(f"Camera restart failed: {e}")
+
     def _perform_graceful_shutdown(self):
         """グレースフルシャットダウンの実行"""
         if self._cleanup_completed:
             return
 
+        # 配信中のストリームに終了を知らせる（ストリームが終わらないとuvicornは接続の終了を待ち続ける）
+        self.shutdown_event.set()
+
+        if self._server_handle:
+            # uvicornに終了を要求する。カメラはlifespanの終了処理でイベントループ外から停止される
+            self.logger.info("Stopping server...")
+            self._server_handle.should_exit = True
+            return
+
         self.logger.info("Starting graceful shutdown sequence...")
 
         try:
-            # 1. カメラ停止
+            # サーバーハンドルがなければカメラを停止してプロセスを終了する
             if self._camera_manager:
                 self.logger.info("Stopping camera...")
                 self._camera_manager.stop()
                 self.logger.info("Camera stopped")
 
-            # 2. サーバー停止（uvicornプロセス）
-            if self._server_handle:
-                self.logger.info("Stopping server...")
-                # uvicornのServerインスタンスがある場合の停止処理
-                # 注意: uvicorn.run()使用時は直接制御が難しいため、プロセス終了で対応
-
             self.logger.info("Graceful shutdown completed")
             self._cleanup_completed = True
 